@@ -0,0 +1,75 @@
+from math import sin, cos
+from numpy import empty, zeros, asarray, float32, sin as np_sin, cos as np_cos
+
+try:
+    from numba import njit
+except ImportError:  # run the kernels as plain Python
+    def njit(*args, **kwargs):
+        return lambda f: f
+
+
+@njit(cache=True)
+def build_srt(x, y, z, alfa, beta, gamma, s_x, s_y, s_z):
+    """
+    Get the 4×4 matrix `scale @ rotation @ shift` filled entry by entry.
+
+    # Parameters
+        - `x`, `y`, `z` (float): shift
+        - `alfa`, `beta`, `gamma` (float): angles in radians
+        - `s_x`, `s_y`, `s_z` (float): scale factors
+
+    # Returns
+        - `out` (ndarray): 4×4 float32 matrix
+    """
+    c_a, c_b, c_c = cos(alfa), cos(beta), cos(gamma)
+    s_a, s_b, s_c = sin(alfa), sin(beta), sin(gamma)
+
+    out = empty((4, 4), dtype=float32)
+    out[0, 0] = s_x*c_b*c_c
+    out[0, 1] = s_x*(s_a*s_b*c_c - c_a*s_c)
+    out[0, 2] = s_x*(c_a*s_b*c_c + s_a*s_c)
+    out[1, 0] = s_y*c_b*s_c
+    out[1, 1] = s_y*(s_a*s_b*s_c + c_a*c_c)
+    out[1, 2] = s_y*(c_a*s_b*s_c - s_a*c_c)
+    out[2, 0] = -s_z*s_b
+    out[2, 1] = s_z*s_a*c_b
+    out[2, 2] = s_z*c_a*c_b
+    for i in range(3):
+        out[i, 3] = out[i, 0]*x + out[i, 1]*y + out[i, 2]*z
+    out[3, 0] = 0
+    out[3, 1] = 0
+    out[3, 2] = 0
+    out[3, 3] = 1
+    return out
+
+
+def build_srt_batch(params):
+    """
+    Get the 4×4 matrices `scale @ rotation @ shift` of many sets of parameters at once.
+
+    Each entry is the same expression as in `build_srt`, evaluated on whole columns
+    of parameters. The entries that are always 0 or 1 are not computed.
+
+    # Parameters
+        - `params` (ndarray): N×9 array, rows of (x, y, z, alfa, beta, gamma, s_x, s_y, s_z)
+
+    # Returns
+        - `out` (ndarray): N×4×4 float32 array
+    """
+    x, y, z, alfa, beta, gamma, s_x, s_y, s_z = asarray(params, dtype=float32).reshape(-1, 9).T
+    c_a, c_b, c_c = np_cos(alfa), np_cos(beta), np_cos(gamma)
+    s_a, s_b, s_c = np_sin(alfa), np_sin(beta), np_sin(gamma)
+
+    out = zeros((len(x), 4, 4), dtype=float32)
+    out[:, 0, 0] = s_x*c_b*c_c
+    out[:, 0, 1] = s_x*(s_a*s_b*c_c - c_a*s_c)
+    out[:, 0, 2] = s_x*(c_a*s_b*c_c + s_a*s_c)
+    out[:, 1, 0] = s_y*c_b*s_c
+    out[:, 1, 1] = s_y*(s_a*s_b*s_c + c_a*c_c)
+    out[:, 1, 2] = s_y*(c_a*s_b*s_c - s_a*c_c)
+    out[:, 2, 0] = -s_z*s_b
+    out[:, 2, 1] = s_z*s_a*c_b
+    out[:, 2, 2] = s_z*c_a*c_b
+    out[:, :3, 3] = out[:, :3, 0]*x[:, None] + out[:, :3, 1]*y[:, None] + out[:, :3, 2]*z[:, None]
+    out[:, 3, 3] = 1
+    return out
@@ -1,9 +1,13 @@
-from numpy import matrix, sin , cos, identity
+from numpy import ndarray, array, sin , cos, eye, float32, float64
+from numpy.linalg import inv
 from typing import Union
 
 from packages.point import Point
 
 
+_I4 = eye(4)  # copied to build the shift matrix
+
+
 class Camera:
     def __init__(self, shift, focal, angle, scale):
         # http://citmalumnes.upc.es/~julianp/lina/section-20.html
@@ -13,32 +17,46 @@ class Camera:
         self.scale = scale
 
         # Init transform
-        self.transform = identity(4)
         self.applyTransform()
 
 
     @property
-    def focal(self) -> matrix:
+    def focal(self) -> ndarray:
         return self._focal
 
 
     @focal.setter
     def focal(self, f: float):
-        self._focal = matrix([
+        self._focal = array([
             [f, 0, 0, 0], 
             [0, f, 0, 0],  
             [0, 0, 1, 0], 
-        ])
+        ], dtype=float64)
+        self._projection = None
 
 
     @property
-    def transform(self) -> matrix:
+    def transform(self) -> ndarray:
         return self._transform
 
 
     @transform.setter
-    def transform(self, t: matrix):
+    def transform(self, t: ndarray):
         self._transform = t
+        self._projection = None
+
+
+    @property
+    def projection(self) -> ndarray:
+        """
+        3×4 matrix `focal @ inv(transform)` that maps world coordinates to the image plane.
+
+        It is cached and only recomputed after `focal` or `transform` are set.
+        The inverse is done in float64 and the result is stored as float32, as the mesh data.
+        """
+        if self._projection is None:
+            self._projection = (self.focal @ inv(self.transform)).astype(float32)
+        return self._projection
 
 
     @property
@@ -75,7 +93,7 @@ class Camera:
             raise TypeError("center must be set using one of: float, int, list, tuple, Point.")
 
 
-    def _rotation_matrix(self) -> matrix:
+    def _rotation_matrix(self) -> ndarray:
         """
         Get the matrix for the rotation.
 
@@ -83,7 +101,7 @@ class Camera:
             - `rotation` (list|tuple): list-like of (yaw, pitch, roll).
 
         # Returns
-            - `rotation_matrix` (matrix): 4×4 matrix
+            - `rotation_matrix` (ndarray): 4×4 matrix
 
         https://en.wikipedia.org/wiki/Rotation_matrix#In_three_dimensions
         """
@@ -92,17 +110,17 @@ class Camera:
         c_a, c_b, c_c = cos(alfa), cos(beta), cos(gamma)
         s_a, s_b, s_c = sin(alfa), sin(beta), sin(gamma)
 
-        rotation_matrix = matrix([
+        rotation_matrix = array([
             [c_b*c_c, s_a*s_b*c_c - c_a*s_c, c_a*s_b*c_c + s_a*s_c, 0],
-            [c_b*s_c, s_a*s_b*s_c + c_a*c_c, c_a*s_b*s_a - s_a*c_c, 0],
+            [c_b*s_c, s_a*s_b*s_c + c_a*c_c, c_a*s_b*s_c - s_a*c_c, 0],
             [   -s_b,               s_a*c_b,               c_a*c_b, 0],
             [      0,                     0,                     0, 1]
-        ])
+        ], dtype=float64)
 
         return rotation_matrix
 
 
-    def _shift_matrix(self) -> matrix:
+    def _shift_matrix(self) -> ndarray:
         """
         Get the matrix that shifts all components by the vector `shift`.
 
@@ -110,15 +128,10 @@ class Camera:
             - `shift` (Point): represents the vector of shift.
 
         # Output:
-            - `shift_matrix` (matrix): 4×4 matrix
+            - `shift_matrix` (ndarray): 4×4 matrix
         """
-        x, y, z = self._shift
-        shift_matrix = matrix([
-            [1, 0, 0, x],
-            [0, 1, 0, y],
-            [0, 0, 1, z],
-            [0, 0, 0, 1]
-        ])
+        shift_matrix = _I4.copy()
+        shift_matrix[:3, 3] = tuple(self._shift)
         return shift_matrix
 
 
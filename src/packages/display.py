@@ -5,6 +5,8 @@ from traceback import print_tb
 # from tracemalloc import start
 # from matplotlib.axis import Axis
 from packages.camera import Camera
+from packages.mesh import applyTransforms
+from packages.scene import Scene
 from numpy import pi, asarray, array
 from matplotlib import pyplot as plt
 # from matplotlib.widgets import TextBox
@@ -23,6 +25,7 @@ class Display:
         winSize:list
     ):
         self.meshes = meshes
+        self.scene = Scene(meshes)
         self.camera = camera
         self.winSize = winSize
 
@@ -42,8 +45,7 @@ class Display:
         """Test slider callback func"""
         movement_val = self._mov_x_slider.val - self.camera.shift.x
         self.camera.applyTransform(shift=[movement_val,0,0])
-        for mesh in self.meshes:    
-            mesh.applyTransform(self.camera)
+        applyTransforms(self.meshes, self.camera)
         self._plotMeshes()
 
     def _slider_rotation_z_callback(self, event):
@@ -58,8 +60,7 @@ class Display:
 
         #self.camera.applyTransform(angle=[0,rotation_angle,0])
 
-        for mesh in self.meshes:  
-            mesh.applyTransform(self.camera)
+        applyTransforms(self.meshes, self.camera)
         self._plotMeshes()
 
     def _slider_rotation_x_callback(self, event):
@@ -72,15 +73,13 @@ class Display:
 
         self.camera.applyTransform(shift = temp_shift)
 
-        for mesh in self.meshes: 
-            mesh.applyTransform(self.camera)
+        applyTransforms(self.meshes, self.camera)
         self._plotMeshes()
 
     def _slider_focal_callback(self, event):
         """Test slider callback func"""
         self.camera.focal = self._focal_slider.val
-        for mesh in self.meshes:    
-            mesh.applyTransform(self.camera)
+        applyTransforms(self.meshes, self.camera)
         self._plotMeshes()
 
 
@@ -95,6 +94,9 @@ class Display:
 
         # Draw points and vertices
         start = time()
+        if self.scene.meshes != self.meshes:  # self.meshes was changed without add_mesh
+            self.scene = Scene(self.meshes)
+        self.scene.project(self.camera)
         for mesh in self.meshes:
             if not mesh.show: 
                 continue
@@ -113,8 +115,7 @@ class Display:
         # plt.figure(figsize=(self.winSize[0], self.winSize[1]))
                 
         # Apply meshes transform with camera
-        for mesh in self.meshes:
-            mesh.applyTransform(self.camera, angle=[0,45,0])
+        applyTransforms(self.meshes, self.camera, angle=[0,45,0])
 
         self._plotMeshes()
      
@@ -165,3 +166,4 @@ class Display:
 
     def add_mesh(self, mesh):
         self.meshes.append(mesh)
+        self.scene = Scene(self.meshes)
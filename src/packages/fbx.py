@@ -1,13 +1,34 @@
 import os
-import json
-from math import radians
+import subprocess
 from pathlib import Path
 from itertools import chain
+from numpy import fromiter, vstack, ones, radians, float32, int32
+
+try:
+    import orjson as _json  # faster, but without load, only loads
+except ImportError:
+    import json as _json
+
+try:
+    import ijson
+except ImportError:  # fall back to loading the whole json
+    ijson = None
+
+try:
+    import fbx  # Autodesk FBX SDK Python bindings
+    # with src/packages in sys.path, this module itself is found as fbx
+    fbx = fbx if hasattr(fbx, 'FbxManager') else None
+except ImportError:  # fall back to readFbxInfo.exe and json
+    fbx = None
 
 # Project defined classes
 from packages.mesh import Mesh
 
 
+# Folder of readFbxInfo.exe, the relative paths of FBX and json files start here
+SCRIPT_DIR = Path(__file__).resolve().parent.parent / "script"
+
+
 class FBXReaderError(Exception):
     def __init__(self, *args, **kwargs):
         Exception.__init__(self, *args, *kwargs)
@@ -16,22 +37,26 @@ class FBXReaderError(Exception):
 def fbx2json(input:str, output:str, force:bool=False):
     """
     Converts a FBX file to json, using external C++ package.
-    """
 
-    # Change working directory
-    os.chdir("src/script")
+    Relative paths are taken from the `src/script` folder.
+    Returns the absolute path of the json file.
+    """
+    output = (SCRIPT_DIR / output).resolve()
 
-    # If exit output.txt, we delete it
-    if os.path.exists(output):
-        if force:
-            os.remove(output)
-        else:
-            raise FileExistsError(f"{output} already exists.")
+    # If the output exists, it is only replaced when forced
+    if output.exists() and not force:
+        raise FileExistsError(f"{output} already exists.")
 
-    # Complete the command with input file name
-    input = "readFbxInfo.exe " + input + " >> " + str(output)
-    # Execute the readFbxInfo.exe
-    os.system(input)
+    # Execute the readFbxInfo.exe, the old output is only replaced when it succeeds
+    temp_output = output.with_suffix('.tmp')
+    try:
+        with open(temp_output, 'wb') as out_file:
+            subprocess.run([str(SCRIPT_DIR / "readFbxInfo.exe"), str(input)], stdout=out_file, cwd=SCRIPT_DIR, check=True)
+        os.replace(temp_output, output)
+    finally:
+        if temp_output.exists():
+            os.remove(temp_output)
+    return output
 
 
 def getKeyIndices(input_dict: dict, list_name_key: str, dict_name_key: str):
@@ -139,28 +164,24 @@ def list2edges(l: list):
     `[0, 4, 6, -3]` is converted to `[(0, 4), (4, 6), (6, 2), (2, 0)]`.
     """
     i = 0
-    out = []
     first_index = 0
     dict = {}
+    seen = set()  # edges already added, to avoid scanning the lists of dict
+
+    def add_edge(x, y):
+        edge = (min(x,y), max(x,y))
+        if edge not in seen:
+            seen.add(edge)
+            dict.setdefault(edge[0], []).append(edge)
 
     while i < len(l)-1:
         x = l[i]   if l[i]   >= 0 else -l[i]   - 1
         y = l[i+1] if l[i+1] >= 0 else -l[i+1] - 1
 
-        if min(x,y) not in dict.keys():
-            dict[min(x,y)] = [(min(x,y), max(x,y))]
-        else:
-            if(min(x,y), max(x,y)) not in dict[min(x,y)]:
-                dict[min(x,y)].append((min(x,y), max(x,y))) 
-        
+        add_edge(x, y)
+
         if l[i+1] < 0:
-            
-            if min(l[first_index],y) not in dict.keys():
-                dict[min(l[first_index],y)] = [(min(l[first_index],y), max(l[first_index],y))]
-            else:
-                if(min(l[first_index],y), max(l[first_index],y)) not in dict[min(l[first_index],y)]:
-                    dict[min(l[first_index],y)].append((min(l[first_index],y), max(l[first_index],y))) 
-            
+            add_edge(l[first_index], y)
             i += 2
             first_index = i
         else:
@@ -168,57 +189,161 @@ def list2edges(l: list):
     
     return list(chain(*dict.values()))
 
+def list2vertices(l: list):
+    """
+    Converts the flat list of FBX vertices to a 4×|V| float32 array in homogeneous coordinates.
+
+    # Example
+    `[1, 2, 3, 4, 5, 6]` is converted to `[[1, 4], [2, 5], [3, 6], [1, 1]]`.
+    """
+    vertices = fromiter(l, dtype=float32, count=len(l)).reshape(-1, 3).T
+    return vstack([vertices, ones(vertices.shape[1], dtype=float32)])
+
+
+def edges2array(edges: list):
+    """Converts the list of tuples of 2 vertices to a |E|×2 int32 array."""
+    return fromiter(chain.from_iterable(edges), dtype=int32, count=2*len(edges)).reshape(-1, 2)
+
+
 def getProperties(objs: dict):
     """
     Given the preprocessed objects of the FBX,
     return the properties:
         verts, edges, shifts, angles, scales
-    as lists.
+    as lists. Each vertex and edge is an array, see `list2vertices` and `edges2array`.
     """
-    # Get vertices and edges
     geoms = objs['Geometry'] if isinstance(objs['Geometry'], list) else [objs['Geometry']]
-    verts = [geom['Vertices']['d'] for geom in geoms]
-    verts = [[vert[i:i+3] for i in range(0,len(vert),3)] for vert in verts]
-    edges = [list2edges(geom['PolygonVertexIndex']['i']) for geom in geoms]
-    
-    # Get translation, rotation and scaling. 
-    # Default values are set as they might not exist in the data.
-    shifts, angles, scales = [], [], []
     models = objs['Model'] if isinstance(objs['Model'], list) else [objs['Model']]
-    for model in models:
-        sh, an, sc = 0, 0, 1
-        for prop in model['Properties70']['P']:
-            if prop['S'][0] == 'Lcl Translation':
-                sh = [shift/100 for shift in prop['D']]
-            elif prop['S'][0] == 'Lcl Rotation':
-                an = [radians(angle) for angle in prop['D']]
-            elif prop['S'][0] == 'Lcl Scaling':
-                sc = [scale/100 for scale in prop['D']]
-        shifts.append(sh)
-        angles.append(an)
-        scales.append(sc)
-    
+    return pairProperties(
+        [geometryArrays(geom) for geom in geoms],
+        [modelTransform(model) for model in models]
+    )
+
+
+def geometryArrays(geom: dict):
+    """
+    Given a preprocessed Geometry of the FBX, return its vertices and edges as arrays,
+    see `list2vertices` and `edges2array`.
+    """
+    return list2vertices(geom['Vertices']['d']), edges2array(list2edges(geom['PolygonVertexIndex']['i']))
+
+
+def modelTransform(model: dict):
+    """
+    Given a preprocessed Model of the FBX, return its translation, rotation and scaling.
+    Default values are set as they might not exist in the data.
+    """
+    # Index the properties by name once, a single property is not wrapped in a list
+    props = model['Properties70']['P']
+    props = props if isinstance(props, list) else [props]
+    props = {prop['S'] if isinstance(prop['S'], str) else prop['S'][0]: prop.get('D') for prop in props}
+
+    sh, an, sc = 0, 0, 1
+    if 'Lcl Translation' in props:
+        sh = fromiter(props['Lcl Translation'], dtype=float32, count=3) / 100
+    if 'Lcl Rotation' in props:
+        an = radians(fromiter(props['Lcl Rotation'], dtype=float32, count=3))
+    if 'Lcl Scaling' in props:
+        sc = fromiter(props['Lcl Scaling'], dtype=float32, count=3) / 100
+    return sh, an, sc
+
+
+def pairProperties(geoms: list, models: list):
+    """
+    Pair the (verts, edges) of each geometry with the (shift, angle, scale) of the
+    model at the same position, and return them as the lists of `getProperties`.
+    """
     # Check that the length of the variables matches
-    if not len(verts) == len(edges) == len(shifts) == len(angles) == len(scales):
+    if not len(geoms) == len(models):
         raise FBXReaderError(
             f"""The length of the properties are not the same:
-            verts:  {len(verts)},
-            edges:  {len(edges)},
-            shifts: {len(shifts)},
-            angles: {len(angles)},
-            scales: {len(scales)}"""
+            geometries: {len(geoms)},
+            models:     {len(models)}"""
         )
+    if not geoms:
+        return [], [], [], [], []
+
+    verts, edges = map(list, zip(*geoms))
+    shifts, angles, scales = map(list, zip(*models))
+    return verts, edges, shifts, angles, scales
+
+
+def getPropertiesSDK(fbx_path: str):
+    """
+    Same as `getProperties`, but reading the FBX file in process with the FBX SDK,
+    so the file is not converted to json and parsed back.
+    """
+    manager = fbx.FbxManager.Create()
+    try:
+        manager.SetIOSettings(fbx.FbxIOSettings.Create(manager, fbx.IOSROOT))
+        importer = fbx.FbxImporter.Create(manager, "")
+        if not importer.Initialize(str(SCRIPT_DIR / fbx_path), -1, manager.GetIOSettings()):
+            raise FBXReaderError(f"Cannot open {fbx_path}: {importer.GetStatus().GetErrorString()}")
+        scene = fbx.FbxScene.Create(manager, "")
+        importer.Import(scene)
+        importer.Destroy()
+
+        verts, edges, shifts, angles, scales = [], [], [], [], []
+        nodes = [scene.GetRootNode()]
+        while nodes:
+            node = nodes.pop()
+            nodes.extend(node.GetChild(i) for i in range(node.GetChildCount()))
+            mesh = node.GetMesh()
+            if mesh is None:
+                continue
+
+            # Same layout as the json: flat xyz list and polygons ending with a negative index
+            points = mesh.GetControlPoints()
+            verts.append(list2vertices([point[i] for point in points for i in range(3)]))
+            polygons = []
+            for p in range(mesh.GetPolygonCount()):
+                polygon = [mesh.GetPolygonVertex(p, i) for i in range(mesh.GetPolygonSize(p))]
+                polygon[-1] = -polygon[-1] - 1
+                polygons.extend(polygon)
+            edges.append(edges2array(list2edges(polygons)))
+
+            shift, angle, scale = node.LclTranslation.Get(), node.LclRotation.Get(), node.LclScaling.Get()
+            shifts.append(fromiter((shift[i] for i in range(3)), dtype=float32, count=3) / 100)
+            angles.append(radians(fromiter((angle[i] for i in range(3)), dtype=float32, count=3)))
+            scales.append(fromiter((scale[i] for i in range(3)), dtype=float32, count=3) / 100)
+    finally:
+        manager.Destroy()
 
     return verts, edges, shifts, angles, scales
 
 
+def readFBXProperties(json_path: str):
+    """
+    Return the properties of the json converted from FBX, see `getProperties`.
+
+    The file is streamed with `ijson` if it is installed:
+    the nodes below the top level are parsed one by one, each Geometry is converted
+    to arrays and only the transform of each Model is kept, so no more than one node
+    is held in memory at a time. In FBX these two nodes are only children of `Objects`.
+    Otherwise the whole json is parsed at once with `orjson`, or `json` if it is not installed.
+    """
+    if ijson is None:
+        with open(json_path, 'rb') as file:
+            return getProperties(preprocessFBXjson(_json.loads(file.read()))['Objects'])
+
+    geoms, models = [], []
+    with open(json_path, 'rb') as file:
+        for child in ijson.items(file, 'children.item.children.item', use_float=True):
+            name = child.pop('name', None)
+            if name == 'Geometry':
+                geoms.append(geometryArrays(preprocessFBXjson(child)))
+            elif name == 'Model':
+                models.append(modelTransform(preprocessFBXjson(child)))
+    return pairProperties(geoms, models)
+
+
 def readFBX(fbx_path: str, json_path: str=None, overwrite: bool=False):
     """
     Return a list of Mesh from the FBX file.
 
     # Parameters:
-      * `fbx_path` (str): path of the file.
-      * `json_path` (str): output json file path. If None, then the name of FBX is used.
+      * `fbx_path` (str): path of the file, relative to `src/script`.
+      * `json_path` (str): output json file path, relative to `src/script`. If None, then the name of FBX is used.
       * `overwrite` (bool): converts it to json even if the `json_path` file already exists.
 
     # Output:
@@ -226,26 +351,32 @@ def readFBX(fbx_path: str, json_path: str=None, overwrite: bool=False):
         The list can be empty.
 
     ⚠ In case that overwrite is set, then converts anyway.
+
+    ⚠ If the FBX SDK Python bindings (`fbx`) are installed, the file is read
+    in process and `json_path` and `overwrite` are not used.
     """
-    # Convert fbx file to json
-    if json_path is None:
-        json_path = Path(fbx_path)
-        json_path = (json_path.parent.parent / "med" / json_path.stem).with_suffix('.json')
+    if fbx is not None:
+        properties = list(zip(*getPropertiesSDK(fbx_path)))
+    else:
+        # Convert fbx file to json
+        if json_path is None:
+            json_path = Path(fbx_path)
+            json_path = (json_path.parent.parent / "med" / json_path.stem).with_suffix('.json')
+        json_path = (SCRIPT_DIR / json_path).resolve()
 
-    try:
-        fbx2json(fbx_path, json_path, overwrite)
-    except FileExistsError as e:
-        print(f'readFBX: {e}')
+        try:
+            fbx2json(fbx_path, json_path, overwrite)
+        except FileExistsError as e:
+            print(f'readFBX: {e}')
 
-    # Open the created json file for data and read objects from it
-    with open(json_path, 'r') as file:
-        data = preprocessFBXjson(json.load(file))
+        # Open the created json file for data and read objects from it
+        properties = list(zip(*readFBXProperties(json_path)))
     
     # Build the list of Mesh
     mesh_list = [
         Mesh(vertex, edge, shift, angle, scale) 
         for vertex, edge, shift, angle, scale
-        in zip(*getProperties(data['Objects']))
+        in properties
     ]
     
     return mesh_list
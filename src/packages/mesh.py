@@ -1,13 +1,35 @@
-from math import isclose
 from multiprocessing.sharedctypes import Value
-from numpy.linalg import inv
-from numpy import matrix, identity, sin, cos, asmatrix, sqrt, append, ones
-from typing import Union # this shouldn't be necessary for Python > 3.9
+from numpy import ndarray, array, asarray, broadcast_to, eye, sin, cos, append, ones, float32
+from typing import Union, TYPE_CHECKING # this shouldn't be necessary for Python > 3.9
 
 # Project packages
 from packages.point import Point
-from packages.display import Display
 from packages.camera import Camera
+if TYPE_CHECKING:  # packages.display imports this module
+    from packages.display import Display
+
+
+_I4 = eye(4, dtype=float32)  # copied to build the sparse 4×4 matrices
+
+
+def _toVec3(value: Union[Point, float, int, list, tuple, ndarray], name: str) -> ndarray:
+    """Convert `value` to a float32 array of 3, a number is repeated."""
+    if isinstance(value, Point):
+        return array((value.x, value.y, value.z), dtype=float32)
+    if isinstance(value, (int, float, list, tuple, ndarray)):
+        vec = asarray(value, dtype=float32)
+        if vec.shape not in ((), (3,)):
+            raise ValueError(f"{name} must have 3 values: ({value})")
+        return array(broadcast_to(vec, 3))
+    raise TypeError(f"{name} must be set using one of: float, int, list, tuple, Point.")
+
+
+def _toNonZeroVec3(value: Union[Point, float, int, list, tuple, ndarray], name: str) -> ndarray:
+    """Same as `_toVec3`, but all the values must be non zero."""
+    vec = _toVec3(value, name)
+    if not vec.all():
+        raise ValueError(f"All values in {name} must be non zero: ({value})")
+    return vec
 
 
 # TODO: add setter for each point of vertices
@@ -17,18 +39,23 @@ class Mesh:
     send it to the Display class for render.
 
     ⚠ Angles in radians
+
+    ⚠ Vertices and transforms are stored as float32, so are the mapped 2D points.
     """
     # ------------------------- internal methods ------------------------- #
     def __init__(
         self,
-        vertices: Union[list, matrix],
+        vertices: Union[list, ndarray],
         edges:   'list[int]',
-        shift:    Union[Point, float, int, list, tuple],
-        angle:    Union[Point, float, int, list, tuple],
-        scale:    Union[Point, float, int, list, tuple],
+        shift:    Union[Point, float, int, list, tuple, ndarray],
+        angle:    Union[Point, float, int, list, tuple, ndarray],
+        scale:    Union[Point, float, int, list, tuple, ndarray],
         color:    str='b'
     ):
-        self.vertices = vertices    # matrix of shape 4×|V|
+        self._camera  = None        # camera of the last applyTransform, used to map to 2D
+        self._scene   = None        # Scene whose arrays hold the data of this mesh, see `_attach`
+        self._idx     = None        # index of this mesh in the Scene
+        self.vertices = vertices    # array of shape 4×|V|
         self.edges    = edges       # need discussion
         self.shift    = shift
         self.angle    = angle
@@ -37,14 +64,14 @@ class Mesh:
         # print('-'*30, 'vertices')
         # print(self.vertices)
 
-        self.transform_matrix = identity(4)  # identity matrix of size 4×4
+        # the transform matrix is built from shift, angle and scale when it is first needed
 
         self.show = True
         self.color = color
 
 
     # TODO: change the assert to exception
-    def _scale_matrix(self) -> matrix:
+    def _scale_matrix(self) -> ndarray:
         """
         Get the matrix that multiplies all the components by a factor of `s`.
 
@@ -52,18 +79,13 @@ class Mesh:
             - `s` (float): factor of product
 
         # Output:
-            - `scale_matrix` (matrix): 4×4 matrix
+            - `scale_matrix` (ndarray): 4×4 matrix
         """
-        x, y, z = self._scale
-        scale_matrix = matrix([
-            [x, 0, 0, 0],
-            [0, y, 0, 0],
-            [0, 0, z, 0],
-            [0, 0, 0, 1]
-        ])
+        scale_matrix = _I4.copy()
+        scale_matrix[0, 0], scale_matrix[1, 1], scale_matrix[2, 2] = self._scale_arr
         return scale_matrix
 
-    def _shift_matrix(self) -> matrix:
+    def _shift_matrix(self) -> ndarray:
         """
         Get the matrix that shifts all components by the vector `shift`.
 
@@ -71,18 +93,13 @@ class Mesh:
             - `shift` (Point): represents the vector of shift.
 
         # Output:
-            - `shift_matrix` (matrix): 4×4 matrix
+            - `shift_matrix` (ndarray): 4×4 matrix
         """
-        x, y, z = self._shift
-        shift_matrix = matrix([
-            [1, 0, 0, x],
-            [0, 1, 0, y],
-            [0, 0, 1, z],
-            [0, 0, 0, 1]
-        ])
+        shift_matrix = _I4.copy()
+        shift_matrix[:3, 3] = self._shift_arr
         return shift_matrix
 
-    def _rotation_matrix(self) -> matrix:
+    def _rotation_matrix(self) -> ndarray:
         """
         Get the matrix for the rotation.
 
@@ -90,32 +107,68 @@ class Mesh:
             - `rotation` (list|tuple): list-like of (yaw, pitch, roll).
 
         # Returns
-            - `rotation_matrix` (matrix): 4×4 matrix
+            - `rotation_matrix` (ndarray): 4×4 matrix
+
+        # Example:
+        >>> from numpy import allclose
+        >>> from scipy.spatial.transform import Rotation
+        >>> R = Mesh([[0,0,0]], [], 0, [.3, .5, .7], 1)._rotation_matrix()[:3,:3]
+        >>> allclose(R, Rotation.from_euler('xyz', [.3, .5, .7]).as_matrix(), atol=1e-6)
+        True
 
         https://en.wikipedia.org/wiki/Rotation_matrix#In_three_dimensions
         """
 
-        alfa, beta, gamma = self._angle
+        alfa, beta, gamma = self._angle_arr
         c_a, c_b, c_c = cos(alfa), cos(beta), cos(gamma)
         s_a, s_b, s_c = sin(alfa), sin(beta), sin(gamma)
 
-        rotation_matrix = matrix([
+        rotation_matrix = array([
             [c_b*c_c, s_a*s_b*c_c - c_a*s_c, c_a*s_b*c_c + s_a*s_c, 0],
-            [c_b*s_c, s_a*s_b*s_c + c_a*c_c, c_a*s_b*s_a - s_a*c_c, 0],
+            [c_b*s_c, s_a*s_b*s_c + c_a*c_c, c_a*s_b*s_c - s_a*c_c, 0],
             [   -s_b,               s_a*c_b,               c_a*c_b, 0],
             [      0,                     0,                     0, 1]
-        ])
+        ], dtype=float32)
 
         return rotation_matrix
 
+    def _fused_srt(self) -> ndarray:
+        """
+        Get the product `scale_matrix @ rotation_matrix @ shift_matrix` in closed form.
+
+        The rotation block is scaled row by row and the last column is
+        that block applied to the shift, so no 4×4 product is needed.
+
+        Compiled with numba, see `packages._mesh_kernels.build_srt`.
+
+        # Returns
+            - `srt_matrix` (ndarray): 4×4 matrix
+
+        # Example:
+        >>> from numpy import allclose
+        >>> m = Mesh([[0,0,0]], [], [1, 2, 3], [.3, .5, .7], [2, 3, 4])
+        >>> allclose(m._fused_srt(), m._scale_matrix() @ m._rotation_matrix() @ m._shift_matrix(), atol=1e-5)
+        True
+
+        The batched kernel used by `buildTransforms` gives the same matrices:
+        >>> from numpy.random import default_rng
+        >>> from packages._mesh_kernels import build_srt, build_srt_batch
+        >>> params = default_rng(0).uniform(-2, 2, (5, 9))
+        >>> allclose(build_srt_batch(params), [build_srt(*row) for row in params], atol=1e-5)
+        True
+        """
+        # numba is slow to import, so it is loaded on first use
+        from packages._mesh_kernels import build_srt
+        return build_srt(*self._shift_arr, *self._angle_arr, *self._scale_arr)
+
     # DONE: add camera as parameter
-    def _to2D(self, camera: Camera) -> matrix:
+    def _to2D(self, camera: Camera) -> ndarray:
         """
         Return the vertices mapped to 2D.
         """
         # print(self.vertices)
 
-        mapped_points = camera.focal @ inv(camera.transform) @ self.transform_matrix @ self.vertices
+        mapped_points = camera.projection @ self.transform_matrix @ self.vertices
         # print('-'*30, 'mapped points 1')
         # print(self.transform_matrix @ self.vertices)
         # print('-'*30, 'mapped points 2')
@@ -124,6 +177,18 @@ class Mesh:
         # print(mapped_points)
         return mapped_points[:2, :] / mapped_points[2,:]  # homogeneous coordinates
 
+    def _get2DVertices(self) -> ndarray:
+        """
+        Return the vertices mapped to 2D, recomputing them only if
+        the vertices, the transform or the camera changed since the last call.
+        """
+        if self._dirty_2D:
+            if self._camera is None:
+                raise RuntimeError("applyTransform must be called with a camera before mapping the vertices to 2D.")
+            self._2DVertices = self._to2D(self._camera)
+            self._dirty_2D = False
+        return self._2DVertices
+
 
     # ------------------------- properties ------------------------- #
     @property
@@ -132,7 +197,7 @@ class Mesh:
 
     # TODO: optimize the process
     @vertices.setter
-    def vertices(self, values: Union[matrix, list]):
+    def vertices(self, values: Union[ndarray, list]):
         """
         Sets the vertices.
 
@@ -154,8 +219,7 @@ class Mesh:
          [1,1,1,1]]              [1,1,1,1]]
          ```
         """
-        if not isinstance(values, matrix):
-            values = asmatrix(values)
+        values = asarray(values, dtype=float32)
         # check if we should add a final row/column of 1s to ensure that it is homogeneous.
         if (values.shape[0] == 3 and (values.shape[1] != 4 or (values.shape[1] == 4 and not (values[:,3] == 1).all()))) or \
            (values.shape[1] == 3 and (values.shape[0] != 4 or (values.shape[0] == 4 and not (values[3,:] == 1).all()))):
@@ -163,9 +227,9 @@ class Mesh:
             point_axis = int(values.shape[1] == 3)  # same as 0 if values.shape[0] == 3 else 1
             new_axs_shape = [values.shape[0], 1] if values.shape[1] == 3 else [1, values.shape[1]]
             # print('values:', values.shape, point_axis, dim_axis)
-            # print('ones', asmatrix([ones(values.shape[dim_axis])]))
+            # print('ones', asarray([ones(values.shape[dim_axis])]))
             # print('ones:',)
-            values = append(values, ones(new_axs_shape), axis=point_axis)
+            values = append(values, ones(new_axs_shape, dtype=float32), axis=point_axis)
 
         if not (values.shape[0] == 4 or values.shape[1] == 4):
             raise ValueError(f"At least one of the dimensions has to be 4 to set the vertices. {values.shape} is given.")
@@ -178,7 +242,13 @@ class Mesh:
         if values.shape[0] != 4 or (values.shape[1] == 4 and (values[:,3] == 1).all()):
             values = values.T
 
-        self._vertices = values
+        if self._scene is None:
+            self._vertices = values
+        elif values.shape == self._vertices.shape:
+            self._vertices[...] = values  # view of the vertices of the Scene
+        else:
+            raise ValueError(f"The number of vertices of a mesh in a Scene cannot change. {values.shape} is given for {self._vertices.shape}.")
+        self._dirty_2D = True
         # print(self._vertices[:5,:5])
 
 
@@ -190,57 +260,43 @@ class Mesh:
     def edges(self, values: list):
         self._edges = values
 
+    # shift, angle and scale are kept as float32 arrays of 3 for the transforms,
+    # the Point is only built when they are read, so it is a copy:
+    # `mesh.shift.x = 1` does not change the mesh, use `mesh.shift = ...` instead
     @property
     def shift(self) -> Point:
-        return self._shift
+        """Copy of the shift, modifying it does not change the mesh."""
+        return Point(*self._shift_arr.tolist())
 
     @shift.setter
-    def shift(self, shift: Union[Point, float, int, list, tuple]):
-        if isinstance(shift, Point):
-            self._shift = shift
-        elif isinstance(shift, (int, float)):
-            self._shift = Point(shift, shift, shift)
-        elif isinstance(shift, (list, tuple)):
-            self._shift = Point(*shift)
-        else:
-            raise TypeError("center must be set using one of: float, int, list, tuple, Point.")
+    def shift(self, shift: Union[Point, float, int, list, tuple, ndarray]):
+        self._shift_arr = _toVec3(shift, "shift")
+        self._srt_dirty = True
+        self._dirty_2D = True
 
 
     @property
     def angle(self) -> Point:
-        return self._angle
+        """Copy of the angle, modifying it does not change the mesh."""
+        return Point(*self._angle_arr.tolist())
 
     @angle.setter
-    def angle(self, angle: Union[Point, float, int, list, tuple]):
-        if isinstance(angle, Point):
-            self._angle = angle
-        elif isinstance(angle, (int, float)):
-            self._angle = Point(angle, angle, angle)
-        elif isinstance(angle, (list, tuple)):
-            self._angle = Point(*angle)
-        else:
-            raise TypeError("angle must be set using one of: float, int, list, tuple, Point.")
+    def angle(self, angle: Union[Point, float, int, list, tuple, ndarray]):
+        self._angle_arr = _toVec3(angle, "angle")
+        self._srt_dirty = True
+        self._dirty_2D = True
 
 
     @property
     def scale(self) -> Point:
-        return self._scale
+        """Copy of the scale, modifying it does not change the mesh."""
+        return Point(*self._scale_arr.tolist())
 
     @scale.setter
-    def scale(self, scale: Union[Point, float, int, list, tuple]):
-
-        if (isinstance(scale, (list, tuple, Point)) and any(v == 0 for v in scale) ) or \
-           (isinstance(scale, (int, float))         and isclose(scale, 0)):
-            raise ValueError(f"All values in scale must be non zero: ({scale})")
-
-        if isinstance(scale, Point):
-            self._scale = scale
-        elif isinstance(scale, (int, float)):
-            self._scale = Point(scale, scale,scale)
-        elif isinstance(scale, (list, tuple)):
-            self._scale = Point(*scale)
-        else:
-            raise TypeError("scale must be set using one of: float, int, list, tuple, Point.")
+    def scale(self, scale: Union[Point, float, int, list, tuple, ndarray]):
+        self._scale_arr = _toNonZeroVec3(scale, "scale")
+        self._srt_dirty = True
+        self._dirty_2D = True
 
     @property
     def show(self) -> bool:
@@ -251,26 +307,45 @@ class Mesh:
         self._show = value
 
     @property
-    def transform_matrix(self) -> matrix:
+    def transform_matrix(self) -> ndarray:
+        if self._srt_dirty:
+            self.transform_matrix = self._fused_srt()
         return self._transform_matrix
 
     @transform_matrix.setter
-    def transform_matrix(self, values: matrix):
-        self._transform_matrix = values
+    def transform_matrix(self, values: ndarray):
+        if self._scene is None:
+            self._transform_matrix = values
+        else:
+            self._transform_matrix[...] = values  # view of the transforms of the Scene
+        self._srt_dirty = False
+        self._dirty_2D = True
 
 
     @property
     def color(self) -> str:
-        return self._color
+        return self._color if self._scene is None else self._scene.colors[self._idx]
 
     # TODO: check if the color is valid
     @color.setter
     def color(self, value: str):
         self._color = value
+        if self._scene is not None:
+            self._scene.colors[self._idx] = value
+
+
+    def _attach(self, scene, idx: int) -> None:
+        """
+        Make the vertices, the transform and the color of this mesh
+        views of the arrays of `scene`, where it has the index `idx`.
+        """
+        self._scene, self._idx = scene, idx
+        self._vertices = scene.verts[idx, :, :scene.counts[idx]]
+        self._transform_matrix = scene.transforms[idx]
 
 
     # ------------------------- methods ------------------------- #
-    def send2render(self, display: Display) -> None:
+    def send2render(self, display: 'Display') -> None:
         """
         Send the actual geometric body to render.
         """
@@ -285,18 +360,18 @@ class Mesh:
 
 
     def get2DVertex(self, i: int):
-        """Given index `i`, return the `i`th mapped point."""
+        """Given index `i`, return the `i`th mapped point (float32)."""
         if not isinstance(i, int):
             raise TypeError(f"Index must be int, {type(i)} is given.")
-        return self._2DVertices[:,i]
+        return self._get2DVertices()[:,i]
 
     def get2DVertexX(self):
         """Given index `i`, return the `i`th mapped point."""
-        return self._2DVertices[0,:]
+        return self._get2DVertices()[0,:]
 
     def get2DVertexY(self):
         """Given index `i`, return the `i`th mapped point."""
-        return self._2DVertices[1,:]
+        return self._get2DVertices()[1,:]
 
 
     def getVertex(self, i: int):
@@ -324,7 +399,9 @@ class Mesh:
         scale: Union[Point, float, int, list, tuple] = 1
     ) -> None:
         """
-        Update the 2D Vertices. First shift, then rotate and at the end scale.
+        Update the transform. First shift, then rotate and at the end scale.
+
+        The 2D vertices are mapped with `camera` the next time they are requested.
 
         # Parameters
             - `center` (Point): for translation
@@ -333,16 +410,51 @@ class Mesh:
 
         https://en.wikipedia.org/wiki/Rotation_matrix#In_three_dimensions
         """
-        # Update internal parameters
-        self.scale *= scale
-        self.shift += shift
-        self.angle += angle
-
-        # Update transoform matrix
-        shift_matrix    = self._shift_matrix()
-        rotation_matrix = self._rotation_matrix()
-        scale_matrix    = self._scale_matrix()
-        self.transform_matrix = scale_matrix @ rotation_matrix @ shift_matrix
-        
-        self._2DVertices = self._to2D(camera)
+        # Update internal parameters, the identity ones (default values) are skipped
+        scale = _toNonZeroVec3(scale, "scale")
+        if (scale != 1).any():
+            self._scale_arr *= scale
+            self._srt_dirty = True
+        shift = _toVec3(shift, "shift")
+        if shift.any():
+            self._shift_arr += shift
+            self._srt_dirty = True
+        angle = _toVec3(angle, "angle")
+        if angle.any():
+            self._angle_arr += angle
+            self._srt_dirty = True
+
+        # The transform matrix is rebuilt when it is read, only if shift, angle or scale changed
+        self._camera = camera
+        self._dirty_2D = True
+
+
+def applyTransforms(
+    meshes: 'list[Mesh]',
+    camera: Camera,
+    shift: Union[Point, float, int, list, tuple, ndarray] = 0,
+    angle: Union[Point, float, int, list, tuple, ndarray] = 0,
+    scale: Union[Point, float, int, list, tuple, ndarray] = 1
+) -> None:
+    """
+    Same as `Mesh.applyTransform` for all the meshes, but the transform matrices
+    that changed are built together with one `build_srt_batch` call.
+    """
+    for mesh in meshes:
+        mesh.applyTransform(camera, shift, angle, scale)
+    buildTransforms(meshes)
+
 
+def buildTransforms(meshes: 'list[Mesh]') -> None:
+    """
+    Build the transform matrices of the meshes whose shift, angle or scale changed
+    with one `build_srt_batch` call, instead of one per mesh when they are read.
+    """
+    meshes = [mesh for mesh in meshes if mesh._srt_dirty]
+    if not meshes:
+        return
+
+    from packages._mesh_kernels import build_srt_batch
+    params = [(*mesh._shift_arr, *mesh._angle_arr, *mesh._scale_arr) for mesh in meshes]
+    for mesh, transform_matrix in zip(meshes, build_srt_batch(params)):
+        mesh.transform_matrix = transform_matrix
@@ -0,0 +1,60 @@
+from numpy import array, empty, zeros, stack, matmul, divide, errstate, float32
+
+# Project packages
+from packages.camera import Camera
+from packages.mesh import Mesh, buildTransforms
+
+
+class Scene:
+    """
+    Holds the data of several meshes in shared arrays (structure of arrays),
+    so all of them are mapped to 2D at once instead of mesh by mesh.
+
+    The meshes keep their API: their vertices, transform and color
+    become views of the arrays of the scene.
+
+    The vertices are padded with zeros up to the largest mesh, so
+    the memory grows with the number of meshes times the largest one.
+
+    # Attributes
+        - `transforms` (ndarray): M×4×4 transform matrices
+        - `verts` (ndarray): M×4×max|V| vertices, the ones of the `i`th mesh are `verts[i, :, :counts[i]]`
+        - `counts` (ndarray): M numbers of vertices
+        - `colors` (ndarray): M colors
+    """
+    # ------------------------- internal methods ------------------------- #
+    def __init__(self, meshes: 'list[Mesh]'):
+        self.meshes = list(meshes)  # the arrays are sized for these meshes
+
+        self.counts = array([mesh.vertices.shape[1] for mesh in meshes], dtype=int)
+        width = max(self.counts, default=0)
+        self.verts = zeros((len(meshes), 4, width), dtype=float32)
+        for idx, mesh in enumerate(meshes):
+            self.verts[idx, :, :self.counts[idx]] = mesh.vertices
+        self.transforms = stack([mesh.transform_matrix for mesh in meshes]) if meshes else empty((0, 4, 4), dtype=float32)
+        self.colors = array([mesh.color for mesh in meshes], dtype=object)  # not truncated when a longer color is set
+        self._mapped_points = empty((len(meshes), 3, width), dtype=float32)  # output of the product
+        self._2DVertices = empty((len(meshes), 2, width), dtype=float32)
+
+        for idx, mesh in enumerate(meshes):
+            mesh._attach(self, idx)
+
+
+    # ------------------------- methods ------------------------- #
+    def project(self, camera: Camera) -> None:
+        """
+        Map the vertices of all the meshes to 2D with `camera` in one product
+        and hand them back to each mesh as its cached 2D vertices.
+
+        The hidden meshes are mapped too, as leaving them out would copy
+        the vertices of the visible ones, so showing them needs no update.
+        """
+        buildTransforms(self.meshes)  # the changed transforms are written in self.transforms
+
+        matmul(camera.projection @ self.transforms, self.verts, out=self._mapped_points)  # M×3×max|V|
+        with errstate(divide='ignore', invalid='ignore'):  # the padding is 0/0
+            divide(self._mapped_points[:, :2], self._mapped_points[:, 2:], out=self._2DVertices)  # homogeneous coordinates
+
+        for idx, mesh in enumerate(self.meshes):
+            mesh._2DVertices = self._2DVertices[idx, :, :self.counts[idx]]
+            mesh._dirty_2D = False